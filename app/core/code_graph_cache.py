@@ -0,0 +1,90 @@
+import logging
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+from cachetools import TTLCache
+
+from app.core.redis_client import get_redis
+
+GRAPH_CACHE_TTL_SECONDS = 300
+# Bumped whenever the cached graph data changes shape.
+GRAPH_CACHE_KEY_PREFIX = "code_graph:v2"
+
+GRAPH_GENERATION_KEY_PREFIX = "code_graph_generation"
+
+# Subgraphs keyed by tuples of (project_id, generation, ...); Redis shares them
+# across workers. The generation lives in Redis too, so bumping it retires a
+# project's cached graphs in every process without touching their local caches.
+_graph_cache: TTLCache = TTLCache(maxsize=1024, ttl=GRAPH_CACHE_TTL_SECONDS)
+_graph_cache_lock = threading.RLock()
+
+
+def _redis_key(project_id: str, *parts: Any) -> str:
+    return ":".join([GRAPH_CACHE_KEY_PREFIX, project_id, *map(str, parts)])
+
+
+def read_cached_graphs(
+    keys: Dict[str, Tuple[Any, ...]]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Look each named subgraph up in the local cache, then fetch the rest from
+    Redis in a single MGET.
+    """
+    with _graph_cache_lock:
+        graphs = {name: _graph_cache.get(key) for name, key in keys.items()}
+    missing = [name for name, graph_data in graphs.items() if graph_data is None]
+    if not missing:
+        return graphs
+
+    try:
+        cached = get_redis().mget([_redis_key(*keys[name]) for name in missing])
+    except Exception as e:
+        logging.warning(f"Failed to read code graph cache from Redis: {e}")
+        return graphs
+
+    with _graph_cache_lock:
+        for name, value in zip(missing, cached):
+            if value:
+                graphs[name] = _graph_cache[keys[name]] = orjson.loads(value)
+    return graphs
+
+
+def write_cached_graphs(entries: Dict[Tuple[Any, ...], Dict[str, Any]]) -> None:
+    """Cache subgraphs locally and in Redis, pipelining the writes."""
+    if not entries:
+        return
+    with _graph_cache_lock:
+        _graph_cache.update(entries)
+    try:
+        pipeline = get_redis().pipeline(transaction=False)
+        for key, graph_data in entries.items():
+            pipeline.setex(
+                _redis_key(*key), GRAPH_CACHE_TTL_SECONDS, orjson.dumps(graph_data)
+            )
+        pipeline.execute()
+    except Exception as e:
+        logging.warning(f"Failed to write code graph cache to Redis: {e}")
+
+
+def get_code_graph_generation(project_id: str) -> Optional[int]:
+    """Return the project's cache generation, or None if Redis is unreachable."""
+    try:
+        generation = get_redis().get(f"{GRAPH_GENERATION_KEY_PREFIX}:{project_id}")
+    except Exception as e:
+        logging.warning(f"Failed to read code graph cache generation from Redis: {e}")
+        return None
+    return int(generation or 0)
+
+
+def invalidate_code_graph_cache(project_id: str) -> None:
+    """
+    Retire every cached subgraph of a project by bumping its generation.
+
+    Parsing calls this when it clears a project's graph and again once the new
+    graph is complete, so subgraphs cached mid-rebuild are never served after.
+    """
+    try:
+        get_redis().incr(f"{GRAPH_GENERATION_KEY_PREFIX}:{project_id}")
+    except Exception as e:
+        logging.warning(f"Failed to invalidate code graph cache in Redis: {e}")
@@ -0,0 +1,69 @@
+import asyncio
+import atexit
+import threading
+from typing import Any, Dict, Optional
+
+from neo4j import AsyncDriver, AsyncGraphDatabase, Driver, GraphDatabase
+
+from app.core.config_provider import config_provider
+
+_driver: Optional[Driver] = None
+_driver_lock = threading.Lock()
+
+# The async driver is bound to the event loop it was opened on, so it lives
+# for the lifetime of the application's loop: opened on startup and closed on
+# shutdown. Short-lived loops (e.g. asyncio.run in a worker) use the sync driver.
+_async_driver: Optional[AsyncDriver] = None
+_async_driver_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def _driver_kwargs() -> Dict[str, Any]:
+    neo4j_config = config_provider.get_neo4j_config()
+    return {
+        "uri": neo4j_config["uri"],
+        "auth": (neo4j_config["username"], neo4j_config["password"]),
+        "max_connection_pool_size": 50,
+        "connection_acquisition_timeout": 30.0,
+        "keep_alive": True,
+    }
+
+
+def get_neo4j_driver() -> Driver:
+    """Return the process-wide Neo4j driver, creating it on first use."""
+    global _driver
+    if _driver is None:
+        with _driver_lock:
+            if _driver is None:
+                _driver = GraphDatabase.driver(**_driver_kwargs())
+                atexit.register(_driver.close)
+    return _driver
+
+
+async def open_async_neo4j_driver() -> None:
+    """Create the async Neo4j driver on the running (application) event loop."""
+    global _async_driver, _async_driver_loop
+    if _async_driver is None:
+        _async_driver = AsyncGraphDatabase.driver(**_driver_kwargs())
+        _async_driver_loop = asyncio.get_running_loop()
+
+
+async def close_async_neo4j_driver() -> None:
+    global _async_driver, _async_driver_loop
+    if _async_driver is not None:
+        driver, _async_driver, _async_driver_loop = _async_driver, None, None
+        await driver.close()
+
+
+def get_async_neo4j_driver() -> Optional[AsyncDriver]:
+    """
+    Return the async Neo4j driver if it was opened on the running event loop.
+
+    Returns None on any other loop; callers then fall back to the sync driver.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+    if loop is not _async_driver_loop:
+        return None
+    return _async_driver
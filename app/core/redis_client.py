@@ -0,0 +1,19 @@
+import threading
+from typing import Optional
+
+from redis import Redis
+
+from app.core.config_provider import config_provider
+
+_redis: Optional[Redis] = None
+_redis_lock = threading.Lock()
+
+
+def get_redis() -> Redis:
+    """Return the process-wide Redis client used by the shared caches."""
+    global _redis
+    if _redis is None:
+        with _redis_lock:
+            if _redis is None:
+                _redis = Redis.from_url(config_provider.get_redis_url())
+    return _redis
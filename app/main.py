@@ -11,6 +11,7 @@ from app.api.router import router as potpie_api_router
 from app.core.base_model import Base
 from app.core.database import SessionLocal, engine
 from app.core.models import *  # noqa #necessary for models to not give import errors
+from app.core.neo4j_driver import close_async_neo4j_driver, open_async_neo4j_driver
 from app.modules.auth.auth_router import auth_router
 from app.modules.code_provider.github.github_router import router as github_router
 from app.modules.conversations.conversations_router import (
@@ -124,6 +125,7 @@ class MainApp:
             }
 
     async def startup_event(self):
+        await open_async_neo4j_driver()
         db = SessionLocal()
         try:
             system_prompt_setup = SystemPromptSetup(db)
@@ -135,9 +137,13 @@ class MainApp:
         finally:
             db.close()
 
+    async def shutdown_event(self):
+        await close_async_neo4j_driver()
+
     def run(self):
         self.add_health_check()
         self.app.add_event_handler("startup", self.startup_event)
+        self.app.add_event_handler("shutdown", self.shutdown_event)
         return self.app
 
 
@@ -1,13 +1,252 @@
 import asyncio
+import functools
 import logging
-from typing import Any, Dict, List, Optional
-
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Dict, List, Literal, Optional, Tuple
+
+from cachetools import TTLCache
 from langchain_core.tools import StructuredTool
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS, AsyncManagedTransaction, ManagedTransaction
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
-from app.modules.projects.projects_model import Project
+from app.core.code_graph_cache import (
+    get_code_graph_generation,
+    read_cached_graphs,
+    write_cached_graphs,
+)
+from app.core.neo4j_driver import get_async_neo4j_driver, get_neo4j_driver
+from app.modules.projects.projects_service import ProjectService
+
+# Cypher lives in module constants and is always sent with the same text and
+# $-parameters: Neo4j keys its plan cache on the query string, so rebuilding or
+# interpolating queries per call would force re-planning. The query is batched
+# over $node_ids so several subgraphs share one round-trip.
+# {rel_types} is filled in with the traversable relationship types (see
+# _get_traversal_rel_types) so the planner only expands typed edges.
+GET_SUBGRAPH_QUERY = """
+UNWIND $node_ids AS nid
+MATCH (start:NODE {node_id: nid, repoId: $project_id})
+CALL apoc.path.subgraphAll(start, {
+    maxLevel: $max_depth,
+    limitNodes: $node_limit,
+    relationshipFilter: $rel_filter
+})
+YIELD nodes
+UNWIND nodes AS node
+OPTIONAL MATCH (node)-[r:{rel_types}]->(child:NODE)
+WITH nid, node, collect({
+    id: child.node_id,
+    relationship: type(r)
+}) as children
+RETURN nid, {
+    id: node.node_id,
+    name: node.name,
+    type: head(labels(node)),
+    file_path: node.file_path,
+    start_line: node.start_line,
+    end_line: node.end_line,
+    children: children
+} as node_data
+"""
+
+# Lets APOC pick each node's tree parent server-side: spanningTree yields one
+# path per reachable node, so every row carries the node's parent and the
+# relationship leading to it, and limitNodes caps the distinct nodes returned.
+# Only the properties the tool returns are projected, so text, docstrings and
+# embeddings stay on the server.
+GET_SPANNING_TREE_QUERY = """
+UNWIND $node_ids AS nid
+MATCH (start:NODE {node_id: nid, repoId: $project_id})
+CALL apoc.path.spanningTree(start, {
+    minLevel: 0,
+    maxLevel: $max_depth,
+    limitNodes: $node_limit,
+    relationshipFilter: $rel_filter
+})
+YIELD path
+WITH nid, path, last(nodes(path)) AS node
+OPTIONAL MATCH (node)-[r:{rel_types}]->(child:NODE)
+WITH nid, path, node, collect({
+    id: child.node_id,
+    relationship: type(r)
+}) as children
+RETURN nid, {
+    id: node.node_id,
+    name: node.name,
+    type: head(labels(node)),
+    file_path: node.file_path,
+    start_line: node.start_line,
+    end_line: node.end_line,
+    parent_id: CASE WHEN length(path) > 0 THEN nodes(path)[-2].node_id END,
+    relationship: CASE WHEN length(path) > 0 THEN type(last(relationships(path))) END,
+    children: children
+} as node_data
+"""
+
+# Link the tree from the parents APOC chose (_link_tree); POTPIE_APOC_TREE=0
+# falls back to the subgraphAll query and the client-side _build_tree.
+USE_APOC_TREE = os.getenv("POTPIE_APOC_TREE", "1") == "1"
+# Part of the cache key: the two paths may order and truncate a tree differently.
+TREE_MODE = "apoc" if USE_APOC_TREE else "subgraph"
+
+# Callers may narrow or widen traversals up to these hard caps. Both queries
+# stop expanding on the server once limitNodes distinct nodes are reached; APOC
+# expands breadth-first, so a truncated graph keeps the nodes nearest its root.
+DEFAULT_MAX_DEPTH = 4
+DEFAULT_NODE_LIMIT = 2000
+MAX_DEPTH_LIMIT = 10
+MAX_NODE_LIMIT = 5000
+MAX_BATCH_NODE_IDS = 50
+
+# Above this many fetched nodes, arun builds each tree on a
+# worker thread so large graphs do not stall the event loop.
+OFFLOAD_TREE_BUILD_THRESHOLD = 1000
+
+# Relationship types that are never followed when expanding a subgraph.
+EXCLUDED_REL_TYPES = frozenset({"IS_LEAF"})
+REL_TYPES_TTL_SECONDS = 600
+
+_tree_build_executor = ThreadPoolExecutor(
+    max_workers=8, thread_name_prefix="code-graph-tree"
+)
+
+# Refreshed periodically since parsing may introduce new relationship types.
+_rel_types_cache: TTLCache = TTLCache(maxsize=1, ttl=REL_TYPES_TTL_SECONDS)
+_rel_types_lock = threading.Lock()
+
+
+def _peek_traversal_rel_types() -> Optional[Tuple[str, ...]]:
+    with _rel_types_lock:
+        return _rel_types_cache.get("rel_types")
+
+
+def _get_traversal_rel_types() -> Tuple[str, ...]:
+    """Return the relationship types in the database that subgraphs may follow."""
+    rel_types = _peek_traversal_rel_types()
+    if rel_types is not None:
+        return rel_types
+    with get_neo4j_driver().session(default_access_mode=READ_ACCESS) as session:
+        all_types = session.execute_read(
+            lambda tx: [
+                record["relationshipType"]
+                for record in tx.run("CALL db.relationshipTypes()")
+            ]
+        )
+    rel_types = tuple(sorted(t for t in all_types if t not in EXCLUDED_REL_TYPES))
+    if rel_types:
+        with _rel_types_lock:
+            _rel_types_cache["rel_types"] = rel_types
+    return rel_types
+
+
+def _traversal_bounds(
+    rel_types: Tuple[str, ...], max_depth: int
+) -> Tuple[Tuple[str, ...], int]:
+    """
+    Return the relationship types and depth a query should traverse.
+
+    With no traversable types the queries still need a type to render, so they
+    fall back to a depth-0 pattern that only matches the start node.
+    """
+    if rel_types:
+        return rel_types, max_depth
+    return tuple(sorted(EXCLUDED_REL_TYPES)), 0
+
+
+@functools.lru_cache(maxsize=64)
+def _render_query(query: str, rel_types: Tuple[str, ...]) -> str:
+    """Inline the relationship types into a query's {rel_types} placeholder."""
+    escaped = "|".join("`" + t.replace("`", "``") + "`" for t in rel_types)
+    return query.replace("{rel_types}", escaped)
+
+
+@functools.lru_cache(maxsize=8192)
+def _get_relative_file_path(file_path: str) -> str:
+    """Convert absolute file path to relative path."""
+    if not file_path or file_path == "Unknown":
+        return "Unknown"
+    parts = file_path.split("/")
+    try:
+        projects_index = parts.index("projects")
+        return "/".join(parts[projects_index + 2 :])
+    except ValueError:
+        return file_path
+
+
+@dataclass(slots=True)
+class _NodeRecord:
+    """
+    A query row until its tree places it. The builders pop each record from
+    node_map as they convert it, so a node is never held as both a record and
+    an output dict.
+    """
+
+    id: str
+    name: Optional[str]
+    type: Optional[str]
+    file_path: Optional[str]
+    start_line: Optional[int]
+    end_line: Optional[int]
+    relationship: Optional[str] = None
+    parent_id: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        node = {
+            "id": self.id,
+            "name": self.name,
+            "type": self.type,
+            "file_path": self.file_path,
+            "start_line": self.start_line,
+            "end_line": self.end_line,
+            "children": [],
+        }
+        if self.relationship is not None:
+            node["relationship"] = self.relationship
+        return node
+
+
+class GetCodeGraphFromNodeIdInput(BaseModel):
+    project_id: str = Field(..., description="The repository ID (UUID)")
+    node_id: str = Field(
+        ..., description="The ID of the node to retrieve the graph for (UUID)"
+    )
+    max_depth: int = Field(
+        DEFAULT_MAX_DEPTH,
+        description=f"Maximum relationship depth to traverse (at most {MAX_DEPTH_LIMIT})",
+    )
+    node_limit: int = Field(
+        DEFAULT_NODE_LIMIT,
+        description=f"Maximum number of nodes to return (at most {MAX_NODE_LIMIT})",
+    )
+    output_format: Literal["tree", "flat"] = Field(
+        "tree",
+        description="'tree' for nested nodes, 'flat' for compact nodes and edges lists",
+    )
+
+
+class GetCodeGraphFromNodeIdsInput(BaseModel):
+    project_id: str = Field(..., description="The repository ID (UUID)")
+    node_ids: List[str] = Field(
+        ...,
+        description=f"List of node IDs to retrieve graphs for (at most {MAX_BATCH_NODE_IDS})",
+    )
+    max_depth: int = Field(
+        DEFAULT_MAX_DEPTH,
+        description=f"Maximum relationship depth to traverse (at most {MAX_DEPTH_LIMIT})",
+    )
+    node_limit: int = Field(
+        DEFAULT_NODE_LIMIT,
+        description=f"Maximum number of nodes per graph (at most {MAX_NODE_LIMIT})",
+    )
+    output_format: Literal["tree", "flat"] = Field(
+        "tree",
+        description="'tree' for nested nodes, 'flat' for compact nodes and edges lists",
+    )
 
 
 class GetCodeGraphFromNodeIdTool:
@@ -17,11 +256,15 @@ class GetCodeGraphFromNodeIdTool:
     description = """Retrieves a code graph showing relationships between nodes starting from a specific node ID.
         :param project_id: string, the repository ID (UUID).
         :param node_id: string, the ID of the node to retrieve the graph for (UUID).
+        :param max_depth: integer, optional, maximum relationship depth to traverse (default: 4, max: 10).
+        :param node_limit: integer, optional, maximum number of nodes to return (default: 2000, max: 5000).
+        :param output_format: string, optional, "tree" (default) or "flat".
 
             example:
             {
                 "project_id": "550e8400-e29b-41d4-a716-446655440000",
-                "node_id": "123e4567-e89b-12d3-a456-426614174000"
+                "node_id": "123e4567-e89b-12d3-a456-426614174000",
+                "max_depth": 4
             }
 
         Returns dictionary containing:
@@ -31,6 +274,10 @@ class GetCodeGraphFromNodeIdTool:
             branch_name: string - branch name
             root_node: object - hierarchical structure of nodes with relationships
           }
+        With output_format "flat", root_node is replaced by:
+            root_node_id: string - ID of the starting node
+            nodes: array - nodes without children
+            edges: array - {source, target, relationship} between node IDs
         """
 
     def __init__(self, sql_db: Session):
@@ -41,171 +288,486 @@ class GetCodeGraphFromNodeIdTool:
             sql_db (Session): SQLAlchemy database session.
         """
         self.sql_db = sql_db
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        """Create and return a Neo4j driver instance."""
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
 
-    async def arun(self, project_id: str, node_id: str) -> Dict[str, Any]:
-        return await asyncio.to_thread(self.run, project_id, node_id)
-
-    def run(self, project_id: str, node_id: str) -> Dict[str, Any]:
+    async def arun(
+        self,
+        project_id: str,
+        node_id: str,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        node_limit: int = DEFAULT_NODE_LIMIT,
+        output_format: Literal["tree", "flat"] = "tree",
+    ) -> Dict[str, Any]:
+        """Async version of run that queries Neo4j through the async driver."""
+        result = await self.arun_many(
+            project_id, [node_id], max_depth, node_limit, output_format
+        )
+        return result["graphs"][node_id] if "graphs" in result else result
+
+    def run(
+        self,
+        project_id: str,
+        node_id: str,
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        node_limit: int = DEFAULT_NODE_LIMIT,
+        output_format: Literal["tree", "flat"] = "tree",
+    ) -> Dict[str, Any]:
         """
         Run the tool to retrieve the code graph.
 
         Args:
             project_id (str): Repository ID.
             node_id (str): ID of the node to retrieve the graph for.
+            max_depth (int): Maximum relationship depth, capped at MAX_DEPTH_LIMIT.
+            node_limit (int): Maximum number of nodes, capped at MAX_NODE_LIMIT.
+            output_format (str): "tree" for a nested root_node, "flat" for
+                nodes and edges lists.
 
         Returns:
             Dict[str, Any]: Code graph data or error message.
         """
+        result = self.run_many(
+            project_id, [node_id], max_depth, node_limit, output_format
+        )
+        return result["graphs"][node_id] if "graphs" in result else result
+
+    async def arun_many(
+        self,
+        project_id: str,
+        node_ids: List[str],
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        node_limit: int = DEFAULT_NODE_LIMIT,
+        output_format: Literal["tree", "flat"] = "tree",
+    ) -> Dict[str, Any]:
+        """Async version of run_many that queries Neo4j through the async driver."""
         try:
-            project = self._get_project(project_id)
+            project = await asyncio.to_thread(self._get_project, project_id)
             if not project:
                 return {
                     "error": f"Project with ID '{project_id}' not found in database"
                 }
 
-            graph_data = self._get_graph_data(project_id, node_id)
-            if not graph_data:
-                return {
-                    "error": f"No graph data found for node ID '{node_id}' in repo '{project_id}'"
-                }
+            node_ids = self._unique_node_ids(node_ids)
+            max_depth, node_limit = self._clamp_bounds(max_depth, node_limit)
+            keys, graphs = await asyncio.to_thread(
+                self._cached_graphs, project_id, node_ids, max_depth, node_limit
+            )
+
+            missing = [node_id for node_id, graph in graphs.items() if graph is None]
+            if missing:
+                fetched = await self._aget_graphs_data(
+                    project_id, missing, max_depth, node_limit
+                )
+                await asyncio.to_thread(self._store_graphs, keys, graphs, fetched)
 
-            return self._process_graph_data(graph_data, project)
+            return self._graphs_result(project_id, graphs, project, output_format)
         except Exception as e:
             logging.exception(f"An unexpected error occurred: {str(e)}")
             return {"error": f"An unexpected error occurred: {str(e)}"}
 
-    def _get_project(self, project_id: str) -> Optional[Project]:
-        """Retrieve project from the database."""
-        return self.sql_db.query(Project).filter(Project.id == project_id).first()
+    def run_many(
+        self,
+        project_id: str,
+        node_ids: List[str],
+        max_depth: int = DEFAULT_MAX_DEPTH,
+        node_limit: int = DEFAULT_NODE_LIMIT,
+        output_format: Literal["tree", "flat"] = "tree",
+    ) -> Dict[str, Any]:
+        """
+        Retrieve the code graphs of several nodes with a single Neo4j query.
 
-    def _get_graph_data(
-        self, project_id: str, node_id: str
-    ) -> Optional[Dict[str, Any]]:
-        """Retrieve graph data from Neo4j."""
-        query = """
-        MATCH (start:NODE {node_id: $node_id, repoId: $project_id})
-        CALL apoc.path.subgraphAll(start, {
-            maxLevel: 10
-        })
-        YIELD nodes, relationships
-        UNWIND nodes AS node
-        OPTIONAL MATCH (node)-[r]->(child:NODE)
-        WHERE child IN nodes AND type(r) <> 'IS_LEAF'
-        WITH node, collect({
-            id: child.node_id,
-            name: child.name,
-            type: head(labels(child)),
-            file_path: child.file_path,
-            start_line: child.start_line,
-            end_line: child.end_line,
-            relationship: type(r)
-        }) as children
-        RETURN {
-            id: node.node_id,
-            name: node.name,
-            type: head(labels(node)),
-            file_path: node.file_path,
-            start_line: node.start_line,
-            end_line: node.end_line,
-            children: children
-        } as node_data
-        """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
-            nodes = [record["node_data"] for record in result]
-            if not nodes:
-                return None
-            return self._build_tree(nodes, node_id)
+        Args:
+            project_id (str): Repository ID.
+            node_ids (List[str]): IDs of the nodes, at most MAX_BATCH_NODE_IDS.
+            max_depth (int): Maximum relationship depth, capped at MAX_DEPTH_LIMIT.
+            node_limit (int): Maximum nodes per graph, capped at MAX_NODE_LIMIT.
+            output_format (str): "tree" for a nested root_node, "flat" for
+                nodes and edges lists.
 
-    def _build_tree(
-        self, nodes: List[Dict[str, Any]], root_id: str
-    ) -> Optional[Dict[str, Any]]:
-        """Build a tree structure from the graph data."""
-        node_map = {node["id"]: node for node in nodes}
-        root = node_map.get(root_id)
-        if not root:
-            return None
+        Returns:
+            Dict[str, Any]: {"graphs": {node_id: code graph data or error}} or
+                an error message.
+        """
+        try:
+            project = self._get_project(project_id)
+            if not project:
+                return {
+                    "error": f"Project with ID '{project_id}' not found in database"
+                }
 
-        visited = set()
+            node_ids = self._unique_node_ids(node_ids)
+            max_depth, node_limit = self._clamp_bounds(max_depth, node_limit)
+            keys, graphs = self._cached_graphs(
+                project_id, node_ids, max_depth, node_limit
+            )
 
-        def build_node_tree(current_node: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-            if current_node["id"] in visited:
-                return None
-            visited.add(current_node["id"])
+            missing = [node_id for node_id, graph in graphs.items() if graph is None]
+            if missing:
+                fetched = self._get_graphs_data(
+                    project_id, missing, max_depth, node_limit
+                )
+                self._store_graphs(keys, graphs, fetched)
 
-            current_node["children"] = [
-                child for child in current_node["children"] if child["id"] in node_map
-            ]
+            return self._graphs_result(project_id, graphs, project, output_format)
+        except Exception as e:
+            logging.exception(f"An unexpected error occurred: {str(e)}")
+            return {"error": f"An unexpected error occurred: {str(e)}"}
 
-            for child in current_node["children"]:
-                child_node = node_map[child["id"]]
-                built_child = build_node_tree(child_node)
-                if built_child:
-                    child["children"] = built_child["children"]
-                else:
-                    current_node["children"].remove(child)
+    def _get_project(self, project_id: str) -> Optional[Dict[str, str]]:
+        """Retrieve the project's repo and branch names, cached briefly."""
+        return ProjectService.get_repo_details_cached(self.sql_db, project_id)
 
-            return current_node
+    @staticmethod
+    def _cached_graphs(
+        project_id: str, node_ids: List[str], max_depth: int, node_limit: int
+    ) -> Tuple[Dict[str, Tuple[Any, ...]], Dict[str, Optional[Dict[str, Any]]]]:
+        """
+        Key each node's subgraph under the project's current cache generation
+        and return the keys with whichever subgraphs are already cached.
 
-        return build_node_tree(root)
+        Returns no keys, so nothing is cached, when the generation cannot be read.
+        """
+        generation = get_code_graph_generation(project_id)
+        if generation is None:
+            return {}, dict.fromkeys(node_ids)
+        keys = {
+            node_id: (project_id, generation, node_id, max_depth, node_limit, TREE_MODE)
+            for node_id in node_ids
+        }
+        return keys, read_cached_graphs(keys)
 
-    def _process_graph_data(
-        self, graph_data: Dict[str, Any], project: Project
-    ) -> Dict[str, Any]:
-        """Process the graph data and prepare the final output."""
-
-        def process_node(node: Dict[str, Any]) -> Dict[str, Any]:
-            processed_node = {
-                "id": node["id"],
-                "name": node["name"],
-                "type": node["type"],
-                "file_path": self._get_relative_file_path(node["file_path"]),
-                "start_line": node["start_line"],
-                "end_line": node["end_line"],
-                "children": [],
+    @staticmethod
+    def _store_graphs(
+        keys: Dict[str, Tuple[Any, ...]],
+        graphs: Dict[str, Optional[Dict[str, Any]]],
+        fetched: Dict[str, Optional[Dict[str, Any]]],
+    ) -> None:
+        """Merge freshly fetched subgraphs into graphs and cache them."""
+        fetched = {
+            node_id: graph_data
+            for node_id, graph_data in fetched.items()
+            if graph_data is not None
+        }
+        graphs.update(fetched)
+        write_cached_graphs(
+            {
+                keys[node_id]: graph_data
+                for node_id, graph_data in fetched.items()
+                if node_id in keys
             }
-            for child in node.get("children", []):
-                processed_child = process_node(child)
-                processed_child["relationship"] = child["relationship"]
-                processed_node["children"].append(processed_child)
-            return processed_node
+        )
 
-        root_node = process_node(graph_data)
+    @staticmethod
+    def _unique_node_ids(node_ids: List[str]) -> List[str]:
+        node_ids = list(dict.fromkeys(node_ids))
+        if len(node_ids) > MAX_BATCH_NODE_IDS:
+            raise ValueError(
+                f"At most {MAX_BATCH_NODE_IDS} node IDs can be requested at once"
+            )
+        return node_ids
 
+    @staticmethod
+    def _clamp_bounds(max_depth: int, node_limit: int) -> Tuple[int, int]:
+        max_depth = max(0, min(int(max_depth), MAX_DEPTH_LIMIT))
+        node_limit = max(1, min(int(node_limit), MAX_NODE_LIMIT))
+        return max_depth, node_limit
+
+    def _graphs_result(
+        self,
+        project_id: str,
+        graphs: Dict[str, Optional[Dict[str, Any]]],
+        project: Dict[str, str],
+        output_format: Literal["tree", "flat"],
+    ) -> Dict[str, Any]:
+        results = {}
+        for node_id, graph_data in graphs.items():
+            if not graph_data:
+                results[node_id] = {
+                    "error": f"No graph data found for node ID '{node_id}' in repo '{project_id}'"
+                }
+            else:
+                results[node_id] = self._process_graph_data(
+                    graph_data, project, output_format
+                )
+        return {"graphs": results}
+
+    def _get_graphs_data(
+        self, project_id: str, node_ids: List[str], max_depth: int, node_limit: int
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Retrieve the graph data of each node from Neo4j."""
+        rel_types = _get_traversal_rel_types()
+        query, params = self._graphs_query(
+            project_id, node_ids, rel_types, max_depth, node_limit
+        )
+        with get_neo4j_driver().session(
+            default_access_mode=READ_ACCESS, fetch_size=1000
+        ) as session:
+            indexes = session.execute_read(self._index_records, query, params)
+        return self._trees_from_indexes(indexes, node_limit)
+
+    async def _aget_graphs_data(
+        self, project_id: str, node_ids: List[str], max_depth: int, node_limit: int
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Async version of _get_graphs_data using the native async driver."""
+        driver = get_async_neo4j_driver()
+        if driver is None:
+            # Not on the application's loop; the sync driver works on any thread.
+            return await asyncio.to_thread(
+                self._get_graphs_data, project_id, node_ids, max_depth, node_limit
+            )
+        rel_types = _peek_traversal_rel_types()
+        if rel_types is None:
+            rel_types = await asyncio.to_thread(_get_traversal_rel_types)
+        query, params = self._graphs_query(
+            project_id, node_ids, rel_types, max_depth, node_limit
+        )
+        async with driver.session(
+            default_access_mode=READ_ACCESS, fetch_size=1000
+        ) as session:
+            indexes = await session.execute_read(self._aindex_records, query, params)
+        return await self._atrees_from_indexes(indexes, node_limit)
+
+    @staticmethod
+    def _graphs_query(
+        project_id: str,
+        node_ids: List[str],
+        rel_types: Tuple[str, ...],
+        max_depth: int,
+        node_limit: int,
+    ) -> Tuple[str, Dict[str, Any]]:
+        rel_types, max_depth = _traversal_bounds(rel_types, max_depth)
+        template = GET_SPANNING_TREE_QUERY if USE_APOC_TREE else GET_SUBGRAPH_QUERY
+        query = _render_query(template, rel_types)
+        params = {
+            "node_ids": node_ids,
+            "project_id": project_id,
+            # Outgoing only: the trees never follow a relationship backwards.
+            "rel_filter": "|".join(f"{t}>" for t in rel_types),
+            "max_depth": max_depth,
+            "node_limit": node_limit,
+        }
+        return query, params
+
+    @classmethod
+    def _index_records(
+        cls, tx: ManagedTransaction, query: str, params: Dict[str, Any]
+    ) -> Dict[str, Tuple[Dict, Dict]]:
+        # Index rows as they stream in rather than buffering the result.
+        indexes: Dict[str, Tuple[Dict, Dict]] = {}
+        for record in tx.run(query, **params):
+            cls._index_record(record, indexes)
+        return indexes
+
+    @classmethod
+    async def _aindex_records(
+        cls, tx: AsyncManagedTransaction, query: str, params: Dict[str, Any]
+    ) -> Dict[str, Tuple[Dict, Dict]]:
+        indexes: Dict[str, Tuple[Dict, Dict]] = {}
+        async for record in await tx.run(query, **params):
+            cls._index_record(record, indexes)
+        return indexes
+
+    @staticmethod
+    def _index_record(record: Any, indexes: Dict[str, Tuple[Dict, Dict]]) -> None:
+        """Add a query row to the node_map and children_by_parent of its root."""
+        node_map, children_by_parent = indexes.setdefault(record["nid"], ({}, {}))
+        node_data = record["node_data"]
+        node_id = node_data["id"]
+        children_by_parent[node_id] = node_data["children"]
+        node_map[node_id] = _NodeRecord(
+            id=node_id,
+            name=node_data["name"],
+            type=node_data["type"],
+            file_path=_get_relative_file_path(node_data["file_path"]),
+            start_line=node_data["start_line"],
+            end_line=node_data["end_line"],
+            relationship=node_data.get("relationship"),
+            parent_id=node_data.get("parent_id"),
+        )
+
+    def _trees_from_indexes(
+        self, indexes: Dict[str, Tuple[Dict, Dict]], node_limit: int
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
         return {
-            "graph": {
-                "name": f"Code Graph for {project.repo_name}",
-                "repo_name": project.repo_name,
-                "branch_name": project.branch_name,
-                "root_node": root_node,
+            node_id: self._tree_from_index(node_id, index, node_limit)
+            for node_id, index in indexes.items()
+        }
+
+    async def _atrees_from_indexes(
+        self, indexes: Dict[str, Tuple[Dict, Dict]], node_limit: int
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Build the trees on the executor, one task per root, for large results."""
+        total_nodes = sum(len(node_map) for node_map, _ in indexes.values())
+        if total_nodes < OFFLOAD_TREE_BUILD_THRESHOLD:
+            return self._trees_from_indexes(indexes, node_limit)
+
+        loop = asyncio.get_running_loop()
+        trees = await asyncio.gather(
+            *(
+                loop.run_in_executor(
+                    _tree_build_executor,
+                    self._tree_from_index,
+                    node_id,
+                    index,
+                    node_limit,
+                )
+                for node_id, index in indexes.items()
+            )
+        )
+        return dict(zip(indexes, trees))
+
+    def _tree_from_index(
+        self, node_id: str, index: Tuple[Dict, Dict], node_limit: int
+    ) -> Optional[Dict[str, Any]]:
+        node_map, children_by_parent = index
+        row_count = len(node_map)
+        if row_count >= node_limit:
+            logging.warning(
+                f"Code graph for node '{node_id}' truncated at {node_limit} nodes"
+            )
+        start = time.perf_counter_ns()
+        if USE_APOC_TREE:
+            nodes = self._link_tree(node_map, node_id)
+        else:
+            nodes = self._build_tree(node_map, children_by_parent, node_id)
+        graph_data = None
+        if nodes:
+            graph_data = {
+                "root_node": nodes[node_id],
+                "edges": self._graph_edges(nodes, children_by_parent),
             }
+        logging.debug(
+            f"Built code graph for node '{node_id}' from {row_count} rows "
+            f"in {time.perf_counter_ns() - start} ns"
+        )
+        return graph_data
+
+    @staticmethod
+    def _graph_edges(
+        nodes: Dict[str, Dict[str, Any]],
+        children_by_parent: Dict[str, List[Dict[str, Any]]],
+    ) -> List[Dict[str, Any]]:
+        """
+        List every relationship between the tree's nodes, including those the
+        tree omits. Rows the tree could not place are left out, so the flat
+        output never has an edge without both of its nodes.
+        """
+        edges = {}
+        for source, children in children_by_parent.items():
+            if source not in nodes:
+                continue
+            for child in children:
+                if child["id"] in nodes:
+                    edges[(source, child["id"], child["relationship"])] = None
+        return [
+            {"source": source, "target": target, "relationship": relationship}
+            for source, target, relationship in edges
+        ]
+
+    def _link_tree(
+        self, node_map: Dict[str, _NodeRecord], root_id: str
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Attach each spanning tree row under the parent APOC reached it from,
+        returning every placed node by ID.
+        """
+        if root_id not in node_map:
+            return None
+
+        # Rows arrive breadth-first, so each parent is converted before its
+        # children and children keep the order APOC found them in.
+        nodes = {}
+        for node_id in list(node_map):
+            record = node_map.pop(node_id)
+            parent = nodes.get(record.parent_id)
+            if node_id != root_id and parent is None:
+                continue
+            node = record.to_dict()
+            nodes[node_id] = node
+            if parent is not None:
+                parent["children"].append(node)
+        return nodes
+
+    def _build_tree(
+        self,
+        node_map: Dict[str, _NodeRecord],
+        children_by_parent: Dict[str, List[Dict[str, Any]]],
+        root_id: str,
+    ) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Build a tree structure from the graph data, visiting each node once,
+        and return every placed node by ID.
+
+        A record is popped from node_map when it is placed, so a child missing
+        from node_map is either outside the subgraph or already in the tree.
+        """
+        if root_id not in node_map:
+            return None
+
+        root = node_map.pop(root_id).to_dict()
+        nodes = {root_id: root}
+        # Iterative DFS: each frame is a placed node and its pending child stubs.
+        stack = [(root, iter(children_by_parent[root_id]))]
+        while stack:
+            parent, pending = stack[-1]
+            child = next(pending, None)
+            if child is None:
+                stack.pop()
+                continue
+            record = node_map.pop(child["id"], None)
+            if record is None:
+                continue
+            child_node = record.to_dict()
+            child_node["relationship"] = child["relationship"]
+            parent["children"].append(child_node)
+            nodes[child["id"]] = child_node
+            stack.append((child_node, iter(children_by_parent[child["id"]])))
+
+        return nodes
+
+    def _process_graph_data(
+        self,
+        graph_data: Dict[str, Any],
+        project: Dict[str, str],
+        output_format: Literal["tree", "flat"] = "tree",
+    ) -> Dict[str, Any]:
+        """
+        Prepare the final output from graph_data's root_node tree and edge list.
+
+        File paths are already relative.
+        """
+        graph = {
+            "name": f"Code Graph for {project['repo_name']}",
+            "repo_name": project["repo_name"],
+            "branch_name": project["branch_name"],
         }
+        if output_format == "flat":
+            graph["root_node_id"] = graph_data["root_node"]["id"]
+            graph.update(self._flatten_graph_data(graph_data))
+        else:
+            graph["root_node"] = graph_data["root_node"]
+        return {"graph": graph}
 
     @staticmethod
-    def _get_relative_file_path(file_path: str) -> str:
-        """Convert absolute file path to relative path."""
-        if not file_path or file_path == "Unknown":
-            return "Unknown"
-        parts = file_path.split("/")
-        try:
-            projects_index = parts.index("projects")
-            return "/".join(parts[projects_index + 2 :])
-        except ValueError:
-            return file_path
+    def _flatten_graph_data(graph_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Flatten the tree into a node list without nested children.
 
-    def __del__(self):
-        """Ensure Neo4j driver is closed when the object is destroyed."""
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
+        Edges come from the full edge list rather than the tree, which keeps
+        only the first relationship leading to each node.
+        """
+        nodes = []
+        stack = [graph_data["root_node"]]
+        while stack:
+            node = stack.pop()
+            nodes.append(
+                {
+                    key: value
+                    for key, value in node.items()
+                    if key not in ("children", "relationship")
+                }
+            )
+            stack.extend(node.get("children", []))
+        return {"nodes": nodes, "edges": graph_data["edges"]}
 
 
 def get_code_graph_from_node_id_tool(sql_db: Session) -> StructuredTool:
@@ -217,11 +779,15 @@ def get_code_graph_from_node_id_tool(sql_db: Session) -> StructuredTool:
         description="""Retrieves a code graph showing relationships between nodes starting from a specific node ID.
         :param project_id: string, the repository ID (UUID).
         :param node_id: string, the ID of the node to retrieve the graph for (UUID).
+        :param max_depth: integer, optional, maximum relationship depth to traverse (default: 4, max: 10).
+        :param node_limit: integer, optional, maximum number of nodes to return (default: 2000, max: 5000).
+        :param output_format: string, optional, "tree" (default) or "flat".
 
             example:
             {
                 "project_id": "550e8400-e29b-41d4-a716-446655440000",
-                "node_id": "123e4567-e89b-12d3-a456-426614174000"
+                "node_id": "123e4567-e89b-12d3-a456-426614174000",
+                "max_depth": 4
             }
 
         Returns dictionary containing:
@@ -231,5 +797,37 @@ def get_code_graph_from_node_id_tool(sql_db: Session) -> StructuredTool:
             branch_name: string - branch name
             root_node: object - hierarchical structure of nodes with relationships
           }
+        With output_format "flat", root_node is replaced by:
+            root_node_id: string - ID of the starting node
+            nodes: array - nodes without children
+            edges: array - {source, target, relationship} between node IDs
+        """,
+        args_schema=GetCodeGraphFromNodeIdInput,
+    )
+
+
+def get_code_graph_from_multiple_node_ids_tool(sql_db: Session) -> StructuredTool:
+    tool_instance = GetCodeGraphFromNodeIdTool(sql_db)
+    return StructuredTool.from_function(
+        coroutine=tool_instance.arun_many,
+        func=tool_instance.run_many,
+        name="Get Code Graph From Multiple Node IDs",
+        description="""Retrieves code graphs for several node IDs in one call. Prefer this over repeated single-node calls.
+        :param project_id: string, the repository ID (UUID).
+        :param node_ids: array, IDs of the nodes to retrieve graphs for (at most 50).
+        :param max_depth: integer, optional, maximum relationship depth to traverse (default: 4, max: 10).
+        :param node_limit: integer, optional, maximum number of nodes per graph (default: 2000, max: 5000).
+        :param output_format: string, optional, "tree" (default) or "flat".
+
+            example:
+            {
+                "project_id": "550e8400-e29b-41d4-a716-446655440000",
+                "node_ids": ["123e4567-e89b-12d3-a456-426614174000", "456e7890-e12b-34d5-a678-426614174000"]
+            }
+
+        Returns dictionary containing:
+        - graphs: {node_id: graph or error} with each graph shaped like the
+          result of Get Code Graph From Node ID
         """,
+        args_schema=GetCodeGraphFromNodeIdsInput,
     )
@@ -3,11 +3,29 @@ import logging
 from typing import Any, Dict, List, Optional
 
 from langchain_core.tools import StructuredTool
-from neo4j import GraphDatabase
+from neo4j import READ_ACCESS
 from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 
-from app.core.config_provider import config_provider
+from app.core.neo4j_driver import get_neo4j_driver
+
+GET_NEIGHBOURS_QUERY = """
+MATCH (n:NODE)
+WHERE n.repoId = $project_id AND n.node_id IN $node_ids
+CALL {
+    WITH n
+    MATCH (n)-[*1..1]-(neighbor:NODE)
+    WHERE neighbor.repoId = $project_id
+    RETURN DISTINCT neighbor.node_id AS node_id,
+           neighbor.name AS name,
+           neighbor.docstring AS docstring
+}
+RETURN COLLECT({
+    node_id: node_id,
+    name: name,
+    docstring: docstring
+}) as neighbors
+"""
 
 
 class GetNodeNeighboursInput(BaseModel):
@@ -42,15 +60,6 @@ class GetNodeNeighboursFromNodeIdTool:
             sql_db (Session): SQLAlchemy database session.
         """
         self.sql_db = sql_db
-        self.neo4j_driver = self._create_neo4j_driver()
-
-    def _create_neo4j_driver(self) -> GraphDatabase.driver:
-        """Create and return a Neo4j driver instance."""
-        neo4j_config = config_provider.get_neo4j_config()
-        return GraphDatabase.driver(
-            neo4j_config["uri"],
-            auth=(neo4j_config["username"], neo4j_config["password"]),
-        )
 
     async def arun(self, project_id: str, node_ids: List[str]) -> Dict[str, Any]:
         return await asyncio.to_thread(self.run, project_id, node_ids)
@@ -86,36 +95,16 @@ class GetNodeNeighboursFromNodeIdTool:
 
         Returns a list of dictionaries containing node_id, name and docstring for each neighbor.
         """
-        query = """
-        MATCH (n:NODE)
-        WHERE n.repoId = $project_id AND n.node_id IN $node_ids
-        CALL {
-            WITH n
-            MATCH (n)-[*1..1]-(neighbor:NODE)
-            WHERE neighbor.repoId = $project_id
-            RETURN DISTINCT neighbor.node_id AS node_id,
-                   neighbor.name AS name,
-                   neighbor.docstring AS docstring
-        }
-        RETURN COLLECT({
-            node_id: node_id,
-            name: name,
-            docstring: docstring
-        }) as neighbors
-        """
-        with self.neo4j_driver.session() as session:
-            result = session.run(query, project_id=project_id, node_ids=node_ids)
+        with get_neo4j_driver().session(default_access_mode=READ_ACCESS) as session:
+            result = session.run(
+                GET_NEIGHBOURS_QUERY, project_id=project_id, node_ids=node_ids
+            )
             record = result.single()
 
             if not record:
                 return None
             return record["neighbors"]
 
-    def __del__(self):
-        """Ensure Neo4j driver is closed when the object is destroyed."""
-        if hasattr(self, "neo4j_driver"):
-            self.neo4j_driver.close()
-
 
 def get_node_neighbours_from_node_id_tool(sql_db: Session) -> StructuredTool:
     tool_instance = GetNodeNeighboursFromNodeIdTool(sql_db)
@@ -80,22 +80,34 @@ class IntelligentCodeGraphTool:
         max_depth: int = 5,
         **kwargs,
     ) -> Dict[str, Any]:
-        """Synchronous version that runs the async implementation in an event loop"""
+        """Synchronous version that runs the async filtering in an event loop"""
+        project_id, node_id, relevance_threshold, max_depth = self._unpack_params(
+            project_id, node_id, relevance_threshold, max_depth
+        )
+
+        if not project_id or not node_id:
+            return {
+                "error": "Missing required parameters: project_id and node_id must be provided"
+            }
+
+        # Fetch with the pooled sync driver: asyncio.run starts a new event loop
+        # per call, and the code graph tool's async driver is bound to its loop.
+        result = self.code_graph_tool.run(project_id, node_id, max_depth=1)
+
+        def filter_graph():
+            return asyncio.run(
+                self._filter_graph(
+                    project_id, node_id, result, relevance_threshold, max_depth
+                )
+            )
+
         try:
             loop = asyncio.get_running_loop()
             if loop.is_running():
                 with ThreadPoolExecutor() as pool:
-                    return pool.submit(
-                        lambda: asyncio.run(
-                            self.arun(
-                                project_id, node_id, relevance_threshold, max_depth
-                            )
-                        )
-                    ).result()
+                    return pool.submit(filter_graph).result()
         except RuntimeError:
-            return asyncio.run(
-                self.arun(project_id, node_id, relevance_threshold, max_depth)
-            )
+            return filter_graph()
 
     async def arun(
         self,
@@ -106,22 +118,45 @@ class IntelligentCodeGraphTool:
         **kwargs,
     ) -> Dict[str, Any]:
         """Async version of run"""
+        project_id, node_id, relevance_threshold, max_depth = self._unpack_params(
+            project_id, node_id, relevance_threshold, max_depth
+        )
+
+        if not project_id or not node_id:
+            return {
+                "error": "Missing required parameters: project_id and node_id must be provided"
+            }
+
+        result = await self.code_graph_tool.arun(project_id, node_id, max_depth=1)
+        return await self._filter_graph(
+            project_id, node_id, result, relevance_threshold, max_depth
+        )
+
+    @staticmethod
+    def _unpack_params(
+        project_id: Any, node_id: str, relevance_threshold: float, max_depth: int
+    ):
+        """Accept the parameters either separately or as a single dict"""
         if isinstance(project_id, dict):
             params = project_id
             project_id = params.get("project_id")
             node_id = params.get("node_id")
             relevance_threshold = params.get("relevance_threshold", 0.6)
             max_depth = params.get("max_depth", 5)
+        return project_id, node_id, relevance_threshold, max_depth
 
-        if not project_id or not node_id:
-            return {
-                "error": "Missing required parameters: project_id and node_id must be provided"
-            }
-
+    async def _filter_graph(
+        self,
+        project_id: str,
+        node_id: str,
+        result: Dict[str, Any],
+        relevance_threshold: float,
+        max_depth: int,
+    ) -> Dict[str, Any]:
+        """Filter the code graph tool's result down to the relevant nodes"""
         try:
             self.visited_nodes = set()
 
-            result = self.code_graph_tool.run(project_id, node_id, max_depth=1)
             if "error" in result:
                 return result
 
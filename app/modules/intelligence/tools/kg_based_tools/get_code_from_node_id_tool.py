@@ -13,6 +13,12 @@ from app.modules.projects.projects_model import Project
 
 logger = logging.getLogger(__name__)
 
+# Shared with the multiple-node-ID and probable-node-name tools.
+GET_NODE_DATA_QUERY = """
+MATCH (n:NODE {node_id: $node_id, repoId: $project_id})
+RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring
+"""
+
 
 class GetCodeFromNodeIdInput(BaseModel):
     project_id: str = Field(description="The repository ID, this is a UUID")
@@ -78,12 +84,10 @@ class GetCodeFromNodeIdTool:
             return {"error": f"An unexpected error occurred: {str(e)}"}
 
     def _get_node_data(self, project_id: str, node_id: str) -> Dict[str, Any]:
-        query = """
-        MATCH (n:NODE {node_id: $node_id, repoId: $project_id})
-        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring
-        """
         with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
+            result = session.run(
+                GET_NODE_DATA_QUERY, node_id=node_id, project_id=project_id
+            )
             return result.single()
 
     def _get_project(self, project_id: str) -> Project:
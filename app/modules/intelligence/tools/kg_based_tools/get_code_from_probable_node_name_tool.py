@@ -9,6 +9,9 @@ from sqlalchemy.orm import Session
 
 from app.core.config_provider import config_provider
 from app.modules.code_provider.code_provider_service import CodeProviderService
+from app.modules.intelligence.tools.kg_based_tools.get_code_from_node_id_tool import (
+    GET_NODE_DATA_QUERY,
+)
 from app.modules.projects.projects_model import Project
 from app.modules.projects.projects_service import ProjectService
 from app.modules.search.search_service import SearchService
@@ -148,12 +151,10 @@ class GetCodeFromProbableNodeNameTool:
             return {"error": f"An unexpected error occurred: {str(e)}"}
 
     def _get_node_data(self, project_id: str, node_id: str) -> Dict[str, Any]:
-        query = """
-        MATCH (n:NODE {node_id: $node_id, repoId: $project_id})
-        RETURN n.file_path AS file_path, n.start_line AS start_line, n.end_line AS end_line, n.text as code, n.docstring as docstring
-        """
         with self.neo4j_driver.session() as session:
-            result = session.run(query, node_id=node_id, project_id=project_id)
+            result = session.run(
+                GET_NODE_DATA_QUERY, node_id=node_id, project_id=project_id
+            )
             return result.single()
 
     def _get_project(self, project_id: str) -> Project:
@@ -9,6 +9,12 @@ from app.core.database import get_db
 from app.modules.parsing.graph_construction.code_graph_service import CodeGraphService
 from app.modules.projects.projects_service import ProjectService
 
+GET_NODES_FROM_TAGS_QUERY = """
+MATCH (n:NODE {repoId: $project_id})
+WHERE any(tag IN $tags WHERE tag IN n.tags)
+RETURN n.file_path AS file_path, n.docstring AS docstring, n.text AS text, n.node_id AS node_id, n.name AS name
+"""
+
 
 class GetNodesFromTagsInput(BaseModel):
     tags: List[str] = Field(description="A list of tags to filter the nodes by")
@@ -87,18 +93,15 @@ class GetNodesFromTags:
             raise ValueError(
                 f"Project with ID '{project_id}' not found in database for user '{self.user_id}'"
             )
-        tag_conditions = " OR ".join([f"'{tag}' IN n.tags" for tag in tags])
-        query = f"""MATCH (n:NODE)
-        WHERE ({tag_conditions}) AND n.repoId = '{project_id}'
-        RETURN n.file_path AS file_path, n.docstring AS docstring, n.text AS text, n.node_id AS node_id, n.name AS name
-        """
         neo4j_config = ConfigProvider().get_neo4j_config()
         nodes = CodeGraphService(
             neo4j_config["uri"],
             neo4j_config["username"],
             neo4j_config["password"],
             next(get_db()),
-        ).query_graph(query)
+        ).query_graph(
+            GET_NODES_FROM_TAGS_QUERY, {"tags": tags, "project_id": project_id}
+        )
         return nodes
 
 
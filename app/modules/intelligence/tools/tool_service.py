@@ -12,6 +12,7 @@ from app.modules.intelligence.tools.code_query_tools.get_code_file_structure imp
 
 from app.modules.intelligence.tools.code_query_tools.get_code_graph_from_node_id_tool import (
     get_code_graph_from_node_id_tool,
+    get_code_graph_from_multiple_node_ids_tool,
     GetCodeGraphFromNodeIdTool,
 )
 from app.modules.intelligence.tools.code_query_tools.get_node_neighbours_from_node_id_tool import (
@@ -82,6 +83,9 @@ class ToolService:
             ),
             "get_nodes_from_tags": get_nodes_from_tags_tool(self.db, self.user_id),
             "get_code_graph_from_node_id": get_code_graph_from_node_id_tool(self.db),
+            "get_code_graph_from_multiple_node_ids": get_code_graph_from_multiple_node_ids_tool(
+                self.db
+            ),
             "change_detection": get_change_detection_tool(self.user_id),
             "get_code_file_structure": get_code_file_structure_tool(self.db),
             "get_node_neighbours_from_node_id": get_node_neighbours_from_node_id_tool(
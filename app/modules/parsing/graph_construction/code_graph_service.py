@@ -6,6 +6,7 @@ from typing import Dict, Optional
 from neo4j import GraphDatabase
 from sqlalchemy.orm import Session
 
+from app.core.code_graph_cache import invalidate_code_graph_cache
 from app.modules.parsing.graph_construction.parsing_repomap import RepoMap
 from app.modules.search.search_service import SearchService
 
@@ -142,6 +143,8 @@ class CodeGraphService:
                 project_id=project_id,
             )
 
+        invalidate_code_graph_cache(project_id)
+
         # Clean up search index
         search_service = SearchService(self.db)
         search_service.delete_project_index(project_id)
@@ -159,9 +162,9 @@ class CodeGraphService:
             record = result.single()
             return dict(record["n"]) if record else None
 
-    def query_graph(self, query):
+    def query_graph(self, query, params: Optional[Dict] = None):
         with self.driver.session() as session:
-            result = session.run(query)
+            result = session.run(query, params)
             return [record.data() for record in result]
 
 
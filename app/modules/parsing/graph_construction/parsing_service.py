@@ -11,6 +11,7 @@ from fastapi import HTTPException
 from git import Repo
 from sqlalchemy.orm import Session
 
+from app.core.code_graph_cache import invalidate_code_graph_cache
 from app.core.config_provider import config_provider
 from app.modules.code_provider.code_provider_service import CodeProviderService
 from app.modules.parsing.graph_construction.code_graph_service import CodeGraphService
@@ -134,6 +135,8 @@ class ParsingService:
             )
 
         finally:
+            # Graphs cached while the project was being rebuilt are partial.
+            invalidate_code_graph_cache(project_id)
             if (
                 extracted_dir
                 and os.path.exists(extracted_dir)
@@ -154,6 +157,12 @@ class ParsingService:
                 """
             session.run(node_query)
 
+            # Index for project-wide lookups and deletes by repo_id alone
+            repo_query = """
+                CREATE INDEX repo_id_NODE IF NOT EXISTS FOR (n:NODE) ON (n.repoId)
+                """
+            session.run(repo_query)
+
             # New composite index for name and repo_id to speed up node name lookups
             name_repo_query = """
                 CREATE INDEX node_name_repo_id_NODE IF NOT EXISTS FOR (n:NODE) ON (n.name, n.repoId)
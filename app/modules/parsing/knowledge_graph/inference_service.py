@@ -110,14 +110,15 @@ class InferenceService:
             offset = 0
             while True:
                 result = session.run(
-                    f"""
+                    """
                     MATCH (f:FUNCTION)
-                    WHERE f.repoId = '{repo_id}'
+                    WHERE f.repoId = $repo_id
                     AND NOT ()-[:CALLS]->(f)
                     AND (f)-[:CALLS]->()
                     RETURN f.node_id as node_id
                     SKIP $offset LIMIT $limit
                     """,
+                    repo_id=repo_id,
                     offset=offset,
                     limit=batch_size,
                 )
@@ -1,16 +1,28 @@
 import logging
+import threading
 from datetime import datetime
+from typing import Dict, Optional
 
+from cachetools import TTLCache
 from fastapi import HTTPException
 from sqlalchemy import String, cast
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from app.core.redis_client import get_redis
 from app.modules.projects.projects_model import Project
 from app.modules.projects.projects_schema import ProjectStatusEnum
 
 logger = logging.getLogger(__name__)
 
+# Repo and branch names are effectively immutable, so hot paths such as the
+# code graph tools read them from here instead of querying on every call.
+# Entries are keyed by (project_id, version); the version lives in Redis, so
+# invalidating a project in one worker retires its entry in every worker.
+REPO_DETAILS_VERSION_KEY_PREFIX = "repo_details_version"
+_repo_details_cache: TTLCache = TTLCache(maxsize=1024, ttl=60)
+_repo_details_lock = threading.Lock()
+
 
 class ProjectServiceError(Exception):
     """Base exception class for ProjectService errors."""
@@ -254,6 +266,7 @@ class ProjectService:
 
         if result > 0:
             db.commit()
+            ProjectService.invalidate_repo_details(project_id)
             return result
 
         return None
@@ -268,6 +281,47 @@ class ProjectService:
             raise HTTPException(status_code=404, detail="Project not found.")
         self.db.delete(project)
         self.db.commit()
+        ProjectService.invalidate_repo_details(project_id)
+
+    @staticmethod
+    def get_repo_details_cached(
+        db: Session, project_id: str
+    ) -> Optional[Dict[str, str]]:
+        """
+        Return the project's repo_name and branch_name, cached for a minute.
+
+        Falls back to the database on every call while Redis is unreachable.
+        """
+        key = None
+        details = None
+        try:
+            version = get_redis().get(f"{REPO_DETAILS_VERSION_KEY_PREFIX}:{project_id}")
+            key = (str(project_id), int(version or 0))
+        except Exception as e:
+            logger.warning(f"Failed to read repo details version from Redis: {e}")
+        if key is not None:
+            with _repo_details_lock:
+                details = _repo_details_cache.get(key)
+        if details is None:
+            project = db.query(Project).filter(Project.id == project_id).first()
+            if not project:
+                return None
+            details = {
+                "repo_name": project.repo_name,
+                "branch_name": project.branch_name,
+            }
+            if key is not None:
+                with _repo_details_lock:
+                    _repo_details_cache[key] = details
+        return details
+
+    @staticmethod
+    def invalidate_repo_details(project_id: str) -> None:
+        """Retire the project's cached repo details in every worker."""
+        try:
+            get_redis().incr(f"{REPO_DETAILS_VERSION_KEY_PREFIX}:{project_id}")
+        except Exception as e:
+            logger.warning(f"Failed to invalidate repo details in Redis: {e}")
 
     async def get_demo_project_id(self, repo_name: str):
         try: